@@ -1,22 +1,166 @@
 from flask import Flask, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 import requests
+from requests.adapters import HTTPAdapter
 import re
 import json
 import os
+import functools
+import threading
+from cachetools import TTLCache
+
+try:
+    import orjson
+except ImportError:
+    # orjson es una extensión compilada; si no hay wheel se usa la librería estándar
+    orjson = None
+
+# loads acepta str o bytes en ambos casos; dumps devuelve bytes (orjson) o str (json)
+json_loads = orjson.loads if orjson is not None else json.loads
+json_dumps = orjson.dumps if orjson is not None else json.dumps
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask respaldado por orjson (lo usa jsonify en todas las rutas)"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 
 # Configuración OMDb
 # Leer desde variable de entorno para no exponer la key en repos públicos
 OMDB_API_KEY = os.getenv("OMDB_API_KEY")
 OMDB_BASE_URL = "http://www.omdbapi.com"
-# Cabeceras por defecto para IMDb y timeout seguro (connect, read)
+# GraphQL de IMDb (el mismo que usa su web): JSON compacto con los episodios de una temporada
+IMDB_GRAPHQL_URL = "https://caching.graphql.imdb.com/"
+SEASON_EPISODES_QUERY = (
+    "query SeasonEpisodes($id: ID!, $season: String!) { title(id: $id) { episodes {"
+    " episodes(first: 250, filter: {includeSeasons: [$season]}) { edges { node {"
+    " id titleText { text } series { episodeNumber { episodeNumber } }"
+    " ratingsSummary { aggregateRating voteCount } } } } } } }"
+)
+# Cabeceras por defecto para IMDb y timeout seguro (connect, read).
+# Accept-Encoding lo fija requests: con el paquete brotli instalado anuncia
+# "gzip, deflate, br" y urllib3 descomprime Brotli de forma transparente.
 DEFAULT_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
     'Accept-Language': 'en-US,en;q=0.9',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8'
 }
 REQUEST_TIMEOUT = (4, 8)
+# GraphQL es un atajo opcional: si tarda, es mejor pasar al scraping que esperarlo
+GRAPHQL_TIMEOUT = (2, 3)
+# Rangos aceptados antes de hacer cualquier llamada upstream
+MAX_SEASON = 100
+MAX_EPISODE = 5000
+# Cache HTTP de respuestas exitosas (edge de Vercel y clientes); los ratings cambian poco
+RESPONSE_CACHE_CONTROL = "public, max-age=3600, s-maxage=3600"
+
+# Sesión HTTP compartida: reutiliza conexiones TCP/TLS (keep-alive) entre requests.
+# En Vercel la sesión sobrevive entre invocaciones del mismo contenedor caliente.
+SESSION = requests.Session()
+SESSION.headers.update(DEFAULT_HEADERS)
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
+# Caché en memoria de respuestas upstream (por contenedor caliente).
+# HTML de IMDb por URL, acotado por número total de caracteres (las páginas pesan ~1 MB)
+HTML_CACHE = TTLCache(maxsize=64 * 1024 * 1024, ttl=1800, getsizeof=len)
+# Episodios de OMDb por temporada, por (imdb_id, season)
+OMDB_SEASON_CACHE = TTLCache(maxsize=256, ttl=3600)
+# Episodios de GraphQL por temporada, por (imdb_id, season)
+GRAPHQL_SEASON_CACHE = TTLCache(maxsize=256, ttl=1800)
+# Temporadas cuya consulta GraphQL falló (no-200 o excepción), por un plazo corto
+GRAPHQL_FAILURE_CACHE = TTLCache(maxsize=256, ttl=300)
+# Episodios confirmados como inexistentes (caché negativa), por (imdb_id, season, episode)
+NOT_FOUND_CACHE = TTLCache(maxsize=4096, ttl=900)
+# Payloads de respuestas exitosas, por endpoint y parámetros
+RESPONSE_CACHE = TTLCache(maxsize=2048, ttl=1800)
+CACHE_LOCK = threading.Lock()
+
+# Delimitadores de los bloques JSON-LD (se localizan con str.find, sin regex)
+LD_JSON_OPEN = '<script type="application/ld+json">'
+SCRIPT_CLOSE = '</script>'
+LD_JSON_OPEN_BYTES = LD_JSON_OPEN.encode()
+SCRIPT_CLOSE_BYTES = SCRIPT_CLOSE.encode()
+STREAM_CHUNK_SIZE = 16 * 1024
+# Bytes en el cable (según Content-Length) que se descartan tras el JSON-LD para devolver
+# la conexión keep-alive al pool; si queda más o no se conoce, se cierra sin leer el resto
+STREAM_DRAIN_LIMIT = 32 * 1024
+
+# Patrones precompilados una sola vez al importar el módulo
+
+# Página individual del episodio: (literal requerido, patrón). Si el literal no está
+# en el HTML el patrón no puede coincidir y se evita recorrer la página con regex
+RATING_PATTERNS = [(marker, re.compile(p)) for marker, p in (
+    ('"ratingValue":', r'"ratingValue":\s*(\d+(?:\.\d+)?)'),
+    ('aria-label="IMDb rating:', r'aria-label="IMDb rating:\s*(\d+(?:\.\d+)?)/10"'),
+    ('ipc-rating-star--rating">', r'ipc-rating-star--rating">(\d+(?:\.\d+)?)<'),
+    ('data-testid="ratingGroup--imdb-rating"', r'data-testid="ratingGroup--imdb-rating"[^>]*?>\s*<span[^>]*?>(\d+(?:\.\d+)?)<')
+)]
+VOTES_PATTERNS = [(marker, re.compile(p)) for marker, p in (
+    ('"ratingCount":', r'"ratingCount":\s*(\d+)'),
+    ('ipc-rating-star--voteCount">', r'ipc-rating-star--voteCount">([^<]+)<'),
+    ('ratings', r'(\d[\d,\.Kk]+)\s+ratings'),
+    ('based on', r'based on\s*(\d[\d,\.Kk]+)\s*user ratings')
+)]
+TITLE_PATTERNS = [(marker, re.compile(p)) for marker, p in (
+    ('<h1', r'<h1[^>]*>([^<]+)</h1>'),
+    ('"name":"', r'"name":"([^"]+)"'),
+    ('<title>', r'<title>([^<]+)</title>')
+)]
+
+# Lista de episodios de la temporada: todas las variantes describen la misma tarjeta del
+# episodio, así que se combinan en una sola alternancia (una pasada, gana la más cercana
+# al anchor). Cada rama tiene un único grupo con nombre, recuperable con m.lastgroup
+LIST_RATING_RE = re.compile(
+    r'ipc-rating-star--rating">(?P<star>\d+(?:\.\d+)?)<'
+    r'|aria-label="IMDb rating:\s*(?P<aria>\d+(?:\.\d+)?)/10"'
+    r'|"ratingValue":\s*(?P<ld>\d+(?:\.\d+)?)'
+    r'|data-testid="ratingGroup--imdb-rating"[^>]*?>\s*<span[^>]*?>(?P<group>\d+(?:\.\d+)?)<'
+)
+LIST_VOTES_RE = re.compile(
+    r'ipc-rating-star--voteCount">(?P<star>[^<]+)<'
+    r'|(?P<text>\d[\d,\.Kk]+)\s+ratings'
+    r'|"ratingCount":\s*(?P<ld>\d+)'
+)
+# Limpieza de votos sin regex: quita paréntesis y todo espacio Unicode (lo mismo que \s)
+VOTES_STRIP_TABLE = {cp: None for cp in range(0x3001) if chr(cp).isspace()}
+VOTES_STRIP_TABLE.update({ord('('): None, ord(')'): None})
+COMMENT_RE = re.compile(r'<!--.*?-->')
+
+# Tramo href=".../title/ttXXXX" que precede al marcador /?ref_=ttep_ep_N en la lista
+EPISODE_HREF_RES = {
+    '"': re.compile(r'href="(?:https?://www\.imdb\.com)?/title/(tt\d+)\Z'),
+    "'": re.compile(r"href='(?:https?://www\.imdb\.com)?/title/(tt\d+)\Z"),
+}
+
+@functools.lru_cache(maxsize=2048)
+def get_episode_title_pattern(season, episode):
+    """Patrón del título en la lista de episodios, compilado una vez por (season, episode)"""
+    return re.compile(rf'ref_=ttep_ep_{episode}(?!\d)[^>]*>\s*(?:S{season}\.E{episode}\s*[^<]*?∙\s*)?([^<]+)\s*</a>')
+
+def find_episode_link(html, episode):
+    """Localizar el enlace del episodio en la lista de la temporada.
+
+    Busca el marcador literal /?ref_=ttep_ep_{episode} con str.find y solo aplica
+    regex sobre los caracteres previos. Devuelve (episode_id, inicio del href) o (None, -1).
+    """
+    for quote, href_re in EPISODE_HREF_RES.items():
+        marker = f'/?ref_=ttep_ep_{episode}{quote}'
+        idx = html.find(marker)
+        while idx >= 0:
+            m = href_re.search(html, max(0, idx - 100), idx)
+            if m:
+                return m.group(1), m.start()
+            idx = html.find(marker, idx + len(marker))
+    return None, -1
 
 def format_imdb_id(imdb_id):
     """Formatear IMDb ID"""
@@ -30,74 +174,183 @@ def validate_imdb_id(imdb_id):
         return False
     return True
 
-def scrape_individual_episode(episode_id):
-    """Scrapea la página individual del episodio para obtener rating, votos y título."""
-    formatted_id = format_imdb_id(episode_id)
-    try:
-        episode_url = f"https://www.imdb.com/title/{formatted_id}/"
-        response = requests.get(episode_url, headers=DEFAULT_HEADERS, timeout=REQUEST_TIMEOUT)
-        if response.status_code != 200:
-            return {"success": False, "error": f"No se pudo acceder a la página del episodio {formatted_id}"}
+def iter_ld_json(html):
+    """Generar el contenido de cada bloque <script type="application/ld+json"> en orden"""
+    pos = 0
+    while True:
+        start = html.find(LD_JSON_OPEN, pos)
+        if start < 0:
+            return
+        start += len(LD_JSON_OPEN)
+        end = html.find(SCRIPT_CLOSE, start)
+        if end < 0:
+            return
+        yield html[start:end]
+        pos = end + len(SCRIPT_CLOSE)
 
-        html = response.text
+def search_marked(html, marker, pattern):
+    """Buscar `pattern` en `html` saltando a la primera aparición del literal `marker`.
 
-        # 1) Intentar JSON-LD (más estable)
-        try:
-            ld_matches = re.findall(r'<script type="application/ld\+json">(.+?)</script>', html, re.DOTALL)
-            for ld in ld_matches:
-                ld = ld.strip()
-                if not ld:
+    Si el literal no aparece no se ejecuta la regex; si el patrón empieza por él,
+    la búsqueda arranca en esa posición en lugar del inicio de la página.
+    """
+    idx = html.find(marker)
+    if idx < 0:
+        return None
+    return pattern.search(html, idx if pattern.pattern.startswith(marker) else 0)
+
+def get_cached_html(url):
+    """Leer HTML de la caché TTL por URL (None si no está)"""
+    with CACHE_LOCK:
+        return HTML_CACHE.get(url)
+
+def cache_html(url, html):
+    """Guardar HTML en la caché TTL por URL"""
+    with CACHE_LOCK:
+        HTML_CACHE[url] = html
+
+def get_cached_response(key):
+    """Leer un payload de respuesta exitosa de la caché (None si no está)"""
+    with CACHE_LOCK:
+        return RESPONSE_CACHE.get(key)
+
+def cache_response(key, payload):
+    """Guardar un payload de respuesta exitosa en la caché y devolverlo"""
+    with CACHE_LOCK:
+        RESPONSE_CACHE[key] = payload
+    return payload
+
+def fetch_html(url, refresh=False):
+    """Descargar HTML de IMDb usando la caché TTL por URL (refresh la salta). None si no hay 200."""
+    html = None if refresh else get_cached_html(url)
+    if html is not None:
+        return html
+
+    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    html = response.text
+    cache_html(url, html)
+    return html
+
+def parse_ld_json_rating(html, formatted_id):
+    """Extraer rating, votos y título del primer bloque JSON-LD con aggregateRating (None si no hay)"""
+    try:
+        for ld in iter_ld_json(html):
+            # Bloques sin la clave no pueden traer rating: no vale la pena parsearlos
+            if '"aggregateRating"' not in ld:
+                continue
+            ld = ld.strip()
+            try:
+                data = json_loads(ld)
+            except Exception:
+                continue
+            items = data if isinstance(data, list) else [data]
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                agg = item.get("aggregateRating") or {}
+                if not agg:
+                    continue
+                rv = agg.get("ratingValue")
+                rc = agg.get("ratingCount")
+                if rv is None:
                     continue
                 try:
-                    data = json.loads(ld)
+                    rating = float(rv)
                 except Exception:
                     continue
-                items = data if isinstance(data, list) else [data]
-                for item in items:
-                    if not isinstance(item, dict):
-                        continue
-                    agg = item.get("aggregateRating") or {}
-                    if not agg:
-                        continue
-                    rv = agg.get("ratingValue")
-                    rc = agg.get("ratingCount")
-                    if rv is None:
-                        continue
+                votes = str(rc) if rc is not None else "0"
+                title = item.get("name") or "Episode"
+                return {
+                    "success": True,
+                    "episode_id": formatted_id,
+                    "rating": rating,
+                    "votes": votes,
+                    "title": title,
+                    "method": "individual_episode_scraping"
+                }
+    except Exception:
+        pass
+    return None
+
+def fetch_episode_html(url, formatted_id, refresh=False):
+    """Descargar la página del episodio en streaming, parando tras el primer bloque JSON-LD.
+
+    Devuelve (resultado, html). Si ese bloque ya trae el rating no se decodifica el resto de
+    la página y html es None; si Content-Length indica que el resto es pequeño se descarta
+    leyéndolo para conservar la conexión, y si no se cierra la respuesta. Si no, se lee el
+    cuerpo completo (que queda cacheado) para los patrones alternativos. (None, None) si no hay 200.
+    Con refresh se ignora la copia cacheada.
+    """
+    html = None if refresh else get_cached_html(url)
+    if html is not None:
+        return None, html
+
+    with SESSION.get(url, timeout=REQUEST_TIMEOUT, stream=True) as response:
+        if response.status_code != 200:
+            return None, None
+        encoding = response.encoding or 'utf-8'
+        chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+
+        # Leer solo hasta cerrar el primer <script type="application/ld+json">
+        buf = bytearray()
+        open_at = -1
+        scan_from = 0
+        head_only = False
+        for chunk in chunks:
+            buf += chunk
+            if open_at < 0:
+                open_at = buf.find(LD_JSON_OPEN_BYTES, scan_from)
+                if open_at < 0:
+                    scan_from = max(0, len(buf) - len(LD_JSON_OPEN_BYTES) + 1)
+                    continue
+                scan_from = open_at + len(LD_JSON_OPEN_BYTES)
+            if buf.find(SCRIPT_CLOSE_BYTES, scan_from) >= 0:
+                head_only = True
+                break
+            scan_from = max(scan_from, len(buf) - len(SCRIPT_CLOSE_BYTES) + 1)
+
+        if head_only:
+            result = parse_ld_json_rating(buf.decode(encoding, errors='replace'), formatted_id)
+            if result:
+                content_length = response.headers.get('Content-Length', '')
+                if content_length.isdigit() and int(content_length) - response.raw.tell() <= STREAM_DRAIN_LIMIT:
+                    # El rating ya está: un fallo al descartar el resto no debe perderlo
                     try:
-                        rating = float(rv)
-                    except Exception:
-                        continue
-                    votes = str(rc) if rc is not None else "0"
-                    title = item.get("name") or "Episode"
-                    return {
-                        "success": True,
-                        "episode_id": formatted_id,
-                        "rating": rating,
-                        "votes": votes,
-                        "title": title,
-                        "method": "individual_episode_scraping"
-                    }
-        except Exception:
-            pass
+                        for _ in chunks:
+                            pass
+                    except requests.RequestException:
+                        pass
+                return result, None
+            # Sin rating en la cabecera: completar la descarga para los patrones alternativos
+            for chunk in chunks:
+                buf += chunk
 
-        # 2) Patrones alternativos en HTML
-        rating_patterns = [
-            r'"ratingValue":\s*(\d+(?:\.\d+)?)',
-            r'aria-label="IMDb rating:\s*(\d+(?:\.\d+)?)/10"',
-            r'ipc-rating-star--rating">(\d+(?:\.\d+)?)<',
-            r'data-testid="ratingGroup--imdb-rating"[^>]*?>\s*<span[^>]*?>(\d+(?:\.\d+)?)<'
-        ]
+    html = buf.decode(encoding, errors='replace')
+    cache_html(url, html)
+    return None, html
 
-        votes_patterns = [
-            r'"ratingCount":\s*(\d+)',
-            r'ipc-rating-star--voteCount">([^<]+)<',
-            r'(\d[\d,\.Kk]+)\s+ratings',
-            r'based on\s*(\d[\d,\.Kk]+)\s*user ratings'
-        ]
+def scrape_individual_episode(episode_id, refresh=False):
+    """Scrapea la página individual del episodio para obtener rating, votos y título."""
+    formatted_id = format_imdb_id(episode_id)
+    try:
+        episode_url = f"https://www.imdb.com/title/{formatted_id}/"
+        result, html = fetch_episode_html(episode_url, formatted_id, refresh)
+        if result:
+            return result
+        if html is None:
+            return {"success": False, "error": f"No se pudo acceder a la página del episodio {formatted_id}"}
 
+        # 1) Intentar JSON-LD (más estable)
+        result = parse_ld_json_rating(html, formatted_id)
+        if result:
+            return result
+
+        # 2) Patrones alternativos en HTML
         rating = None
-        for pattern in rating_patterns:
-            m = re.search(pattern, html, re.DOTALL)
+        for marker, pattern in RATING_PATTERNS:
+            m = search_marked(html, marker, pattern)
             if m:
                 try:
                     rating = float(m.group(1))
@@ -109,8 +362,8 @@ def scrape_individual_episode(episode_id):
             return {"success": False, "error": f"No se encontró rating en la página del episodio {formatted_id}"}
 
         votes = "0"
-        for vpat in votes_patterns:
-            vm = re.search(vpat, html, re.DOTALL)
+        for marker, vpat in VOTES_PATTERNS:
+            vm = search_marked(html, marker, vpat)
             if vm:
                 votes = vm.group(1)
                 break
@@ -119,14 +372,9 @@ def scrape_individual_episode(episode_id):
             votes = "0"
 
         # Título
-        title_patterns = [
-            r'<h1[^>]*>([^<]+)</h1>',
-            r'"name":"([^"]+)"',
-            r'<title>([^<]+)</title>'
-        ]
         title = "Episode"
-        for tpat in title_patterns:
-            tm = re.search(tpat, html, re.DOTALL)
+        for marker, tpat in TITLE_PATTERNS:
+            tm = search_marked(html, marker, tpat)
             if tm:
                 title = tm.group(1).strip()
                 break
@@ -142,6 +390,21 @@ def scrape_individual_episode(episode_id):
     except Exception as e:
         return {"success": False, "error": f"Error interno: {str(e)}"}
 
+@app.after_request
+def add_cache_headers(response):
+    """Marcar como cacheables las respuestas de rating exitosas y responder 304 si el ETag coincide"""
+    # ?nocache=1 pide datos frescos: no dejar que el edge ni el cliente los guarden
+    if request.args.get("nocache") == "1":
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    if response.status_code == 200 and response.is_json:
+        payload = response.get_json(silent=True)
+        if isinstance(payload, dict) and payload.get("success"):
+            response.headers["Cache-Control"] = RESPONSE_CACHE_CONTROL
+            response.add_etag()
+            response.make_conditional(request)
+    return response
+
 @app.route('/')
 def root():
     """Información básica de la API"""
@@ -166,18 +429,109 @@ def health():
         "message": "API funcionando correctamente"
     })
 
-def get_episode_id_from_omdb(imdb_id, season, episode):
+def get_graphql_season(imdb_id, season, refresh=False):
+    """Obtener los episodios de una temporada vía GraphQL de IMDb como {número: nodo}, con caché"""
+    cache_key = (imdb_id, season)
+    if not refresh:
+        with CACHE_LOCK:
+            cached = GRAPHQL_SEASON_CACHE.get(cache_key)
+            failed = cache_key in GRAPHQL_FAILURE_CACHE
+        if cached is not None:
+            return cached
+        if failed:
+            return None
+
+    try:
+        payload = {"query": SEASON_EPISODES_QUERY, "variables": {"id": imdb_id, "season": str(season)}}
+        response = SESSION.post(
+            IMDB_GRAPHQL_URL,
+            data=json_dumps(payload),
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+            timeout=GRAPHQL_TIMEOUT
+        )
+        if response.status_code != 200:
+            with CACHE_LOCK:
+                GRAPHQL_FAILURE_CACHE[cache_key] = True
+            return None
+        data = json_loads(response.content)
+
+        # Una respuesta 200 sin episodios (p.ej. errores de GraphQL) también se cachea,
+        # vacía, para no repetir la consulta en cada request mientras dure el TTL
+        edges = data.get("data")
+        for key in ("title", "episodes", "episodes", "edges"):
+            edges = edges.get(key) if isinstance(edges, dict) else None
+
+        episodes = {}
+        for edge in edges or []:
+            node = (edge or {}).get("node") or {}
+            number = ((node.get("series") or {}).get("episodeNumber") or {}).get("episodeNumber")
+            if isinstance(number, int):
+                episodes[number] = node
+    except Exception as e:
+        app.logger.warning("Error en GraphQL de IMDb: %s", e)
+        # Recordar el fallo unos minutos para no pagar el timeout en cada request
+        with CACHE_LOCK:
+            GRAPHQL_FAILURE_CACHE[cache_key] = True
+        return None
+
+    with CACHE_LOCK:
+        GRAPHQL_SEASON_CACHE[cache_key] = episodes
+    return episodes
+
+def get_omdb_season(imdb_id, season, refresh=False):
+    """Obtener los episodios de una temporada en OMDb como {número: episodio}, con caché"""
+    cache_key = (imdb_id, season)
+    if not refresh:
+        with CACHE_LOCK:
+            cached = OMDB_SEASON_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+    omdb_url = f"{OMDB_BASE_URL}?i={imdb_id}&Season={season}&apikey={OMDB_API_KEY}"
+    response = SESSION.get(omdb_url, timeout=REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    data = json_loads(response.content)
+    if data.get("Response") != "True":
+        return None
+
+    episodes = {}
+    for ep in data.get("Episodes") or []:
+        try:
+            episodes[int(ep.get("Episode"))] = ep
+        except (TypeError, ValueError):
+            continue
+    # Solo se cachean respuestas válidas; los fallos pueden ser transitorios
+    with CACHE_LOCK:
+        OMDB_SEASON_CACHE[cache_key] = episodes
+    return episodes
+
+def get_episode_id_from_omdb(imdb_id, season, episode, refresh=False):
     """Obtener episode ID específico de OMDb (fallback cuando no se encuentra en lista)"""
     try:
-        # Si no hay key configurada, no intentar OMDb
+        # Si no hay key configurada, no intentar OMDb. Sin consulta no hay confirmación
+        # de que el episodio no exista, así que no se marca not_found (no se cachea)
         if not OMDB_API_KEY:
             app.logger.warning("OMDb API key missing. Skipping OMDb lookup.")
             return {"success": False}
+
+        # 1) Temporada completa (una sola llamada cacheada sirve a todos sus episodios)
+        episodes = get_omdb_season(imdb_id, season, refresh) or {}
+        ep = episodes.get(episode)
+        if ep and ep.get("imdbID"):
+            return {
+                "success": True,
+                "episode_id": ep["imdbID"],
+                "title": ep.get("Title", f"Episode {episode}"),
+                "method": "omdb_episode_id"
+            }
+
+        # 2) Episodio suelto, por si el listado de la temporada viene incompleto
         omdb_url = f"{OMDB_BASE_URL}?i={imdb_id}&Season={season}&Episode={episode}&apikey={OMDB_API_KEY}"
         
-        response = requests.get(omdb_url, timeout=REQUEST_TIMEOUT)
+        response = SESSION.get(omdb_url, timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             
             if data.get("Response") == "True" and data.get("imdbID"):
                 return {
@@ -186,10 +540,12 @@ def get_episode_id_from_omdb(imdb_id, season, episode):
                     "title": data.get("Title", f"Episode {episode}"),
                     "method": "omdb_episode_id"
                 }
+            # OMDb respondió y el episodio no existe: único caso cacheable como inexistente
+            return {"success": False, "not_found": True}
         
         return {"success": False}
     except Exception as e:
-        print(f"Error en OMDb: {e}")
+        app.logger.warning("Error en OMDb: %s", e)
         return {"success": False}
 
 
@@ -207,15 +563,59 @@ def get_episode_rating(imdb_id, season, episode):
             "success": False,
             "error": "IMDb ID inválido"
         }), 400
+
+    if not (1 <= season <= MAX_SEASON and 1 <= episode <= MAX_EPISODE):
+        return jsonify({
+            "imdb_id": imdb_id,
+            "season": season,
+            "episode": episode,
+            "rating": None,
+            "success": False,
+            "error": "Temporada o episodio fuera de rango"
+        }), 400
     
     formatted_id = format_imdb_id(imdb_id)
+    # ?nocache=1 fuerza la consulta upstream ignorando todas las cachés en memoria
+    refresh = request.args.get("nocache") == "1"
+
+    response_key = ("season", formatted_id, season, episode)
+    not_found_key = (formatted_id, season, episode)
+    if not refresh:
+        cached = get_cached_response(response_key)
+        if cached is not None:
+            return jsonify(cached)
+
+        # Episodio ya confirmado como inexistente: responder sin tocar IMDb ni OMDb
+        with CACHE_LOCK:
+            not_found = NOT_FOUND_CACHE.get(not_found_key)
+        if not_found is not None:
+            return jsonify(not_found)
     
     try:
+        # 0) GraphQL de IMDb: una consulta JSON por temporada, sin descargar ni parsear HTML
+        node = (get_graphql_season(formatted_id, season, refresh) or {}).get(episode)
+        summary = (node or {}).get("ratingsSummary") or {}
+        if summary.get("aggregateRating") is not None:
+            app.logger.info("method=graphql status=success")
+            vote_count = summary.get("voteCount")
+            return jsonify(cache_response(response_key, {
+                "imdb_id": formatted_id,
+                "season": season,
+                "episode": episode,
+                "rating": float(summary["aggregateRating"]),
+                "votes": str(vote_count) if vote_count is not None else "0",
+                "title": (node.get("titleText") or {}).get("text") or f"Episode {episode}",
+                "success": True,
+                "method": "graphql",
+                "episode_id": node.get("id"),
+                "error": None
+            }))
+
         # URL de episodios de la temporada específica
         url = f"https://www.imdb.com/title/{formatted_id}/episodes/?season={season}"
-        app.logger.info(f"GET season list: {formatted_id} S{season}E{episode}")
-        response = requests.get(url, headers=DEFAULT_HEADERS, timeout=REQUEST_TIMEOUT)
-        if response.status_code != 200:
+        app.logger.info("GET season list: %s S%dE%d", formatted_id, season, episode)
+        html = fetch_html(url, refresh)
+        if html is None:
             return jsonify({
                 "imdb_id": formatted_id,
                 "season": season,
@@ -224,70 +624,39 @@ def get_episode_rating(imdb_id, season, episode):
                 "success": False,
                 "error": f"No se pudo acceder a la temporada {season}"
             })
-        
-        html = response.text
 
         # 1) Localizar el anchor del episodio por ref_=ttep_ep_{episode} y extraer episode_id
-        link_patterns = [
-            rf'href="(?:https?://www\.imdb\.com)?/title/(tt\d+)/\?ref_=ttep_ep_{episode}"',
-            rf"href='(?:https?://www\.imdb\.com)?/title/(tt\d+)/\?ref_=ttep_ep_{episode}'",
-            rf'href="/title/(tt\d+)/\?ref_=ttep_ep_{episode}"'
-        ]
-        link_match = None
-        for lp in link_patterns:
-            link_match = re.search(lp, html)
-            if link_match:
-                break
-
-        if link_match:
-            episode_id = link_match.group(1)
-            anchor_idx = link_match.start()
-            # Tomar un snippet alrededor del anchor para buscar rating/votos
-            snippet = html[anchor_idx: anchor_idx + 3000]
+        episode_id, anchor_idx = find_episode_link(html, episode)
+        if episode_id:
+            # Buscar rating/votos en los 3000 caracteres desde el anchor, pasando los límites
+            # a search(pos, endpos) en lugar de copiar el tramo a un string nuevo
+            snippet_end = anchor_idx + 3000
 
             # 2) Extraer rating y votos con varios patrones tolerantes
-            rating_patterns = [
-                rf'ipc-rating-star--rating">(\d+(?:\.\d+)?)<',
-                rf'aria-label="IMDb rating:\s*(\d+(?:\.\d+)?)/10"',
-                rf'"ratingValue":\s*(\d+(?:\.\d+)?)',
-                rf'data-testid="ratingGroup--imdb-rating"[^>]*?>\s*<span[^>]*?>(\d+(?:\.\d+)?)<'
-            ]
-            votes_patterns = [
-                rf'ipc-rating-star--voteCount">([^<]+)<',
-                rf'(\d[\d,\.Kk]+)\s+ratings',
-                rf'"ratingCount":\s*(\d+)'
-            ]
-
             rating_val = None
-            for rp in rating_patterns:
-                rm = re.search(rp, snippet, re.DOTALL)
-                if rm:
-                    try:
-                        rating_val = float(rm.group(1))
-                        break
-                    except Exception:
-                        continue
+            rm = LIST_RATING_RE.search(html, anchor_idx, snippet_end)
+            if rm:
+                rating_val = float(rm[rm.lastgroup])
 
             if rating_val is not None:
                 votes = "0"
-                for vp in votes_patterns:
-                    vm = re.search(vp, snippet, re.DOTALL)
-                    if vm:
-                        votes_raw = vm.group(1)
-                        # Normalizar
-                        votes = re.sub(r'\s|&nbsp;|\(|\)', '', votes_raw)
-                        votes = re.sub(r'<!--.*?-->', '', votes)
-                        votes = votes.strip()
-                        break
+                vm = LIST_VOTES_RE.search(html, anchor_idx, snippet_end)
+                if vm:
+                    votes_raw = vm[vm.lastgroup]
+                    # Normalizar
+                    votes = votes_raw.replace('&nbsp;', '').translate(VOTES_STRIP_TABLE)
+                    if '<!--' in votes:
+                        votes = COMMENT_RE.sub('', votes)
+                    votes = votes.strip()
                 # Asegurar valor por defecto cuando no se detecten votos
                 if not votes or not str(votes).strip():
                     votes = "0"
 
                 # Título desde el anchor
-                title_match = re.search(rf'ref_=ttep_ep_{episode}[^>]*>\s*(?:S{season}\.E{episode}\s*[^<]*?∙\s*)?([^<]+)\s*</a>', snippet, re.DOTALL)
+                title_match = get_episode_title_pattern(season, episode).search(html, anchor_idx, snippet_end)
                 title = title_match.group(1).strip() if title_match else f"Episode {episode}"
                 app.logger.info("method=direct_scraping status=success")
-                return jsonify({
+                return jsonify(cache_response(response_key, {
                     "imdb_id": formatted_id,
                     "season": season,
                     "episode": episode,
@@ -297,13 +666,13 @@ def get_episode_rating(imdb_id, season, episode):
                     "success": True,
                     "method": "direct_scraping",
                     "error": None
-                })
+                }))
 
             # 3) Si no encontramos rating en la lista pero sí el episode_id, probar página individual
-            fallback = scrape_individual_episode(episode_id)
+            fallback = scrape_individual_episode(episode_id, refresh)
             if fallback.get("success"):
                 app.logger.info("method=individual_episode_fallback status=success")
-                return jsonify({
+                return jsonify(cache_response(response_key, {
                     "imdb_id": formatted_id,
                     "season": season,
                     "episode": episode,
@@ -314,10 +683,10 @@ def get_episode_rating(imdb_id, season, episode):
                     "method": "individual_episode_scraping",
                     "episode_id": episode_id,
                     "error": None
-                })
+                }))
 
             # Si tampoco en la individual, devolver guía para usar endpoint individual (contrato previo)
-            app.logger.info(f"method=episode_id_found_in_list episode_id={episode_id}")
+            app.logger.info("method=episode_id_found_in_list episode_id=%s", episode_id)
             return jsonify({
                 "imdb_id": formatted_id,
                 "season": season,
@@ -331,9 +700,9 @@ def get_episode_rating(imdb_id, season, episode):
             })
 
         # 4) Si no aparece el episodio en la lista, usar OMDb solo para obtener episode_id
-        omdb_result = get_episode_id_from_omdb(formatted_id, season, episode)
+        omdb_result = get_episode_id_from_omdb(formatted_id, season, episode, refresh)
         if omdb_result and omdb_result["success"]:
-            app.logger.info(f"method=omdb_episode_id_found episode_id={omdb_result['episode_id']}")
+            app.logger.info("method=omdb_episode_id_found episode_id=%s", omdb_result["episode_id"])
             return jsonify({
                 "imdb_id": formatted_id,
                 "season": season,
@@ -346,7 +715,7 @@ def get_episode_rating(imdb_id, season, episode):
                 "error": f"Episode ID encontrado: {omdb_result['episode_id']}. Use endpoint /imdb/{omdb_result['episode_id']}/rating para obtener rating."
             })
         else:
-            return jsonify({
+            not_found = {
                 "imdb_id": formatted_id,
                 "season": season,
                 "episode": episode,
@@ -354,7 +723,13 @@ def get_episode_rating(imdb_id, season, episode):
                 "success": False,
                 "method": "omdb_episode_id_not_found",
                 "error": f"No se encontró el episodio {episode} (S{season}.E{episode})" if formatted_id != "tt0388629" else f"No se encontró el episodio {episode} de One Piece"
-            })
+            }
+            # Solo se cachea si OMDb confirmó que no existe; un fallo de red o de OMDb
+            # puede ser transitorio y no debe ocultar el episodio durante 15 minutos
+            if omdb_result.get("not_found"):
+                with CACHE_LOCK:
+                    NOT_FOUND_CACHE[not_found_key] = not_found
+            return jsonify(not_found)
             
     except Exception as e:
         return jsonify({
@@ -380,12 +755,20 @@ def get_individual_episode_rating(episode_id):
         }), 400
     
     formatted_id = format_imdb_id(episode_id)
+    # ?nocache=1 fuerza la consulta upstream ignorando todas las cachés en memoria
+    refresh = request.args.get("nocache") == "1"
+
+    response_key = ("episode", formatted_id)
+    if not refresh:
+        cached = get_cached_response(response_key)
+        if cached is not None:
+            return jsonify(cached)
     
     try:
-        app.logger.info(f"GET episode page: {formatted_id}")
-        result = scrape_individual_episode(formatted_id)
+        app.logger.info("GET episode page: %s", formatted_id)
+        result = scrape_individual_episode(formatted_id, refresh)
         if result.get("success"):
-            return jsonify({
+            return jsonify(cache_response(response_key, {
                 "episode_id": result["episode_id"],
                 "rating": result["rating"],
                 "votes": result.get("votes", "0"),
@@ -393,7 +776,7 @@ def get_individual_episode_rating(episode_id):
                 "success": True,
                 "method": result.get("method", "individual_episode_scraping"),
                 "error": None
-            })
+            }))
         else:
             return jsonify({
                 "episode_id": formatted_id,